@@ -106,6 +106,20 @@ TREND_ARROW_VALUES = [None, 'DOUBLE_UP', 'SINGLE_UP', '45_UP', 'FLAT',
                       '45_DOWN', 'SINGLE_DOWN', 'DOUBLE_DOWN', 'NOT_COMPUTABLE',
                       'OUT_OF_RANGE']
 
+SESSION_STATES = [None, 'REMOVED', 'EXPIRED', 'RESIDUAL_DEVIATION',
+                  'COUNTS_DEVIATION', 'SECOND_SESSION', 'OFF_TIME_LOSS',
+                  'STARTED', 'BAD_TRANSMITTER', 'MANUFACTURING_MODE',
+                  'UNKNOWN1', 'UNKNOWN2', 'UNKNOWN3', 'UNKNOWN4', 'UNKNOWN5',
+                  'UNKNOWN6', 'UNKNOWN7', 'UNKNOWN8']
+
+EVENT_TYPES = [None, 'CARBS', 'INSULIN', 'HEALTH', 'EXCERCISE', 'MAX_VALUE']
+
+EVENT_SUB_TYPES = {'INSULIN': [None, 'FAST', 'LONG'],
+                   'HEALTH': [None, 'ILLNESS', 'STRESS', 'HIGH_SYMPTOMS',
+                              'LOW_SYMTOMS', 'CYCLE', 'ALCOHOL'],
+                   'EXCERCISE': [None, 'LIGHT', 'MEDIUM', 'HEAVY',
+                                 'MAX_VALUE']}
+
 SPECIAL_GLUCOSE_VALUES = {0: None,
                           1: 'SENSOR_NOT_ACTIVE',
                           2: 'MINIMAL_DEVIATION',
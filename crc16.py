@@ -27,6 +27,8 @@
 #
 #########################################################################
 
+import numpy as np
+
 TABLE = [
   0, 4129, 8258, 12387, 16516, 20645, 24774, 28903, 33032, 37161, 41290, 
   45419, 49548, 53677, 57806, 61935, 4657, 528, 12915, 8786, 21173, 17044, 
@@ -61,6 +63,25 @@ def crc16(buf, start=None, end=None):
   if end is None:
     end = len(buf)
   num = 0
-  for i in range(start, end):
-    num = ((num<<8)&0xff00) ^ TABLE[((num>>8)&0xff)^ord(buf[i])]
+  # Iterating over a bytearray yields ints directly, on any python version
+  # and for any bytes-like buf, so there's no per-byte ord() call. Slicing a
+  # memoryview, rather than buf itself, means the range is only copied once.
+  for b in bytearray(memoryview(buf)[start:end]):
+    num = ((num<<8)&0xff00) ^ TABLE[((num>>8)&0xff)^b]
   return num & 0xffff
+
+
+_NP_TABLE = np.array(TABLE, dtype=np.uint16)
+
+def crc16_many(buf, record_size, count):
+  # Computes the CRC of each of 'count' consecutive records of 'record_size'
+  # bytes in buf, covering all but the last 2 bytes (the stored crc) of each.
+  # The table lookup runs once per byte position over every record at the
+  # same time, rather than once per byte of each record. This is plain numpy,
+  # so it behaves the same on x86 and ARM hosts.
+  records = np.frombuffer(buf, dtype=np.uint8, count=record_size * count)
+  records = records.reshape(count, record_size)
+  num = np.zeros(count, dtype=np.uint16)
+  for i in range(record_size - 2):
+    num = (num << 8) ^ _NP_TABLE[(num >> 8) ^ records[:, i]]
+  return num
@@ -47,11 +47,22 @@ import constants
 import struct
 import util
 import binascii
+import numpy as np
 
 EGV_TESTNUM_MASK = 0x00ffffff
 
+# Little-endian unsigned short, for reading a single crc value
+_U16LE = struct.Struct('<H')
+
+# ' xx' hex text for every possible byte value, used by dump()
+_DUMP_HEX = [' %02x' % i for i in range(256)]
+
 class BaseDatabaseRecord(object):
   FORMAT = None
+  __slots__ = ('raw_data', 'data')
+  # Record types whose FORMAT is made up entirely of numeric fields also
+  # define an equivalent numpy dtype, so a whole page can be decoded at once.
+  _NP_DTYPE = None
 
   @classmethod
   def _CheckFormat(cls):
@@ -61,8 +72,15 @@ class BaseDatabaseRecord(object):
 
   @classmethod
   def _ClassFormat(cls):
-    cls._CheckFormat()
-    return struct.Struct(cls.FORMAT)
+    # The compiled Struct is cached on each class the first time it's needed.
+    # Look in the class's own __dict__, so a subclass never picks up the
+    # Struct compiled for its parent's FORMAT.
+    fmt = cls.__dict__.get('_STRUCT')
+    if fmt is None:
+      cls._CheckFormat()
+      fmt = struct.Struct(cls.FORMAT)
+      cls._STRUCT = fmt
+    return fmt
 
   @classmethod
   def _ClassSize(cls):
@@ -70,8 +88,7 @@ class BaseDatabaseRecord(object):
 
   @property
   def FMT(self):
-    self._CheckFormat()
-    return _ClassFormat()
+    return self._ClassFormat()
 
   @property
   def SIZE(self):
@@ -81,10 +98,11 @@ class BaseDatabaseRecord(object):
   def crc(self):
     return self.data[-1]
 
-  def __init__(self, data, raw_data):
+  def __init__(self, data, raw_data, verify=True):
     self.raw_data = raw_data
     self.data = data
-    self.check_crc()
+    if verify:
+      self.check_crc()
 
   def check_crc(self):
     local_crc = self.calculate_crc()
@@ -92,22 +110,82 @@ class BaseDatabaseRecord(object):
       raise constants.CrcError('Could not parse %s' % self.__class__.__name__)
 
   def dump(self):
-    return ''.join(' %02x' % ord(c) for c in self.raw_data)
+    return ''.join([_DUMP_HEX[b] for b in bytearray(self.raw_data)])
 
   def calculate_crc(self):
-    return crc16.crc16(self.raw_data[:-2])
+    return crc16.crc16(self.raw_data, 0, len(self.raw_data) - 2)
 
   @classmethod
   def Create(cls, data, record_counter):
-    offset = record_counter * cls._ClassSize()
-    raw_data = data[offset:offset + cls._ClassSize()]
-    unpacked_data = cls._ClassFormat().unpack(raw_data)
-    return cls(unpacked_data, raw_data)
+    size = cls._ClassSize()
+    offset = record_counter * size
+    unpacked_data = cls._ClassFormat().unpack_from(data, offset)
+    return cls(unpacked_data, data[offset:offset + size])
+
+  @classmethod
+  def Creator(cls):
+    # Returns a function equivalent to cls.Create, specialised for this class,
+    # with the record size and the Struct's unpack_from captured in it, so
+    # a loop over a page can call it without any per-record class lookups.
+    # Classes which override Create() just get their own Create back.
+    if cls.Create.__func__ is not BaseDatabaseRecord.Create.__func__:
+      return cls.Create
+    creator = cls.__dict__.get('_CREATOR')
+    if creator is None:
+      size = cls._ClassSize()
+      unpack_from = cls._ClassFormat().unpack_from
+      def creator(data, record_counter):
+        offset = record_counter * size
+        return cls(unpack_from(data, offset), data[offset:offset + size])
+      cls._CREATOR = creator
+    return creator
+
+  @classmethod
+  def Page(cls, data, count):
+    # Returns 'count' records as a numpy structured array, one column per
+    # field, for callers which want to work on whole columns at a time.
+    # The array is a view onto data, so nothing is copied.
+    return np.frombuffer(data, dtype=cls._NP_DTYPE, count=count)
+
+  @classmethod
+  def BadCrcIndices(cls, data, count):
+    # Returns a numpy array of the indices of the records in the page whose
+    # stored crc doesn't match their data. It's empty if they're all good.
+    computed = crc16.crc16_many(data, cls._ClassSize(), count)
+    return np.nonzero(computed != cls.Page(data, count)['crc'])[0]
+
+  @classmethod
+  def VerifyPage(cls, data, count):
+    # Page(), with the CRC of every record checked in one pass over the page
+    bad = cls.BadCrcIndices(data, count)
+    if bad.size:
+      raise constants.CrcError('Could not parse %s, bad crc in records %s'
+                               % (cls.__name__, bad.tolist()))
+    return cls.Page(data, count)
+
+  @classmethod
+  def CreateAll(cls, data, count):
+    # Decode and CRC check 'count' records in a single pass over the page,
+    # rather than one at a time. Records are built as they're consumed, up
+    # to the first one with a bad crc, where CrcError is raised.
+    size = cls._ClassSize()
+    bad = cls.BadCrcIndices(data, count)
+    good_count = int(bad[0]) if bad.size else count
+    page = cls.Page(data, good_count)
+    for record_counter, unpacked_data in enumerate(page.tolist()):
+      offset = record_counter * size
+      yield cls(unpacked_data, data[offset:offset + size], verify=False)
+    if bad.size:
+      raise constants.CrcError('Could not parse %s' % cls.__name__)
 
 
 class GenericTimestampedRecord(BaseDatabaseRecord):
+  __slots__ = ()
   FIELDS = [ ]
   BASE_FIELDS = [ 'system_time', 'display_time' ]
+  # Fields, across all the record types, whose property returns a datetime
+  TIME_FIELDS = [ 'system_time', 'display_time', 'insertion_time',
+                  'meter_time', 'entered', 'applied' ]
 
   @property
   def system_time(self):
@@ -125,16 +203,40 @@ class GenericTimestampedRecord(BaseDatabaseRecord):
   def display_secs(self):
     return self.data[1]
 
+  @classmethod
+  def PageSystemTime(cls, page):
+    return util.ReceiverTimesToDatetime64(page['system_secs'])
+
+  @classmethod
+  def PageDisplayTime(cls, page):
+    return util.ReceiverTimesToDatetime64(page['display_secs'])
+
+  @classmethod
+  def _DictBuilder(cls):
+    # Generate a to_dict() function for this class, with an assignment
+    # written out for each field, so there's no getattr() or isoformat
+    # check per field at run time. It's built once and cached on the class.
+    builder = cls.__dict__.get('_DICT_BUILDER')
+    if builder is None:
+      lines = [ 'def to_dict(self):', '  d = dict( )' ]
+      for k in cls.BASE_FIELDS + cls.FIELDS:
+        if k in cls.TIME_FIELDS:
+          lines.append('  d[%r] = self.%s.isoformat( )' % (k, k))
+        else:
+          lines.append('  d[%r] = self.%s' % (k, k))
+      lines.append('  return d')
+      namespace = { }
+      exec('\n'.join(lines), namespace)
+      builder = namespace['to_dict']
+      cls._DICT_BUILDER = builder
+    return builder
+
   def to_dict (self):
-    d = dict( )
-    for k in self.BASE_FIELDS + self.FIELDS:
-      d[k] = getattr(self, k)
-      if callable(getattr(d[k], 'isoformat', None)):
-        d[k] = d[k].isoformat( )
-    return d
+    return self._DictBuilder()(self)
 
 class GenericXMLRecord(GenericTimestampedRecord):
   FORMAT = '<II490sH'
+  __slots__ = ()
 
   @property
   def xmldata(self):
@@ -143,6 +245,7 @@ class GenericXMLRecord(GenericTimestampedRecord):
 
 
 class InsertionRecord(GenericTimestampedRecord):
+  __slots__ = ()
   FIELDS = ['insertion_time', 'session_state']
   FORMAT = '<3IBH'
 
@@ -158,12 +261,7 @@ class InsertionRecord(GenericTimestampedRecord):
 
   @property
   def session_state(self):
-    states = [None, 'REMOVED', 'EXPIRED', 'RESIDUAL_DEVIATION',
-              'COUNTS_DEVIATION', 'SECOND_SESSION', 'OFF_TIME_LOSS',
-              'STARTED', 'BAD_TRANSMITTER', 'MANUFACTURING_MODE',
-              'UNKNOWN1', 'UNKNOWN2', 'UNKNOWN3', 'UNKNOWN4', 'UNKNOWN5',
-              'UNKNOWN6', 'UNKNOWN7', 'UNKNOWN8']
-    return states[self.data[3]]
+    return constants.SESSION_STATES[self.data[3]]
 
   @property
   def state_value(self):
@@ -174,6 +272,7 @@ class InsertionRecord(GenericTimestampedRecord):
 
 class G5InsertionRecord (InsertionRecord):
   FORMAT = '<3IBI6sH'
+  __slots__ = ()
 
   @property
   def number(self):
@@ -187,6 +286,7 @@ class G5UserSettings (GenericTimestampedRecord):
   # {'RecordLength': '50', 'Name': 'UserSettingData', 'RecordRevision': '5', 'Id': '12'}
   FORMAT = '<4I6sI8HBBIH'   # total length = 50
                             # Values in positions 2,3,5,13,15, 16 are unknown
+  __slots__ = ()
 
   @property
   def transmitterPaired (self):
@@ -220,6 +320,7 @@ class G6UserSettings (GenericTimestampedRecord):
   # {'RecordLength': '60', 'Name': 'UserSettingData', 'RecordRevision': '6', 'Id': '12'}
   FORMAT = '<4I6sI8HBBHB4s7BH'   # total length = 60
                             # Values in positions 2,3,5,13,15,17 are unknown
+  __slots__ = ()
 
   @property
   def transmitterPaired (self):
@@ -256,13 +357,45 @@ class G6UserSettings (GenericTimestampedRecord):
     return self.data[18]     # Sensor Code is a 4-byte string
   
 
+class SubCal (GenericTimestampedRecord):
+  FORMAT = '<IIIIc'
+  __slots__ = ('displayOffset',)
+  BASE_FIELDS = [ ]
+  FIELDS = [ 'entered', 'meter',  'sensor', 'applied', ]
+  def __init__ (self, raw_data, displayOffset=None):
+    if isinstance(raw_data, memoryview):
+      raw_data = raw_data.tobytes()
+    self.raw_data = raw_data
+    self.data = self._ClassFormat().unpack(raw_data)
+    self.displayOffset = displayOffset
+  @property
+  def entered  (self):
+    return util.ReceiverTimeToTime(self.data[0])
+  @property
+  def meter  (self):
+    return self.data[1]
+  @property
+  def sensor  (self):
+    return self.data[2]
+  @property
+  def applied  (self):
+    return util.ReceiverTimeToTime(self.data[3])
+
 class Calibration(GenericTimestampedRecord):
   FORMAT = '<2Iddd3cdb'
+  __slots__ = ('page_data', 'subcals', '_raw')
+  # Size of the fixed part of the record, and of each SubCal that follows it.
+  # The whole record, including the crc, is LEGACY_SIZE or REV_2_SIZE.
+  _CAL_SIZE = struct.calcsize(FORMAT)
+  _SUB_SIZE = struct.calcsize(SubCal.FORMAT)
   # CAL_FORMAT = '<2Iddd3cdb'
   FIELDS = [ 'slope', 'intercept', 'scale', 'decay', 'numsub', 'raw' ]
   @property
   def raw (self):
-    return binascii.hexlify(self.raw_data)
+    # The hex string is built on first use, then kept
+    if self._raw is None:
+      self._raw = binascii.hexlify(self.raw_data)
+    return self._raw
   @property
   def slope  (self):
     return self.data[2]
@@ -277,7 +410,7 @@ class Calibration(GenericTimestampedRecord):
     return self.data[8]
   @property
   def numsub (self):
-    return int(self.data[9])
+    return self.data[9]
 
   def __repr__(self):
     return '%s: CAL SET:%s' % (self.display_time, self.raw)
@@ -291,34 +424,27 @@ class Calibration(GenericTimestampedRecord):
 
   @classmethod
   def Create(cls, data, record_counter):
+    # Calibration records are large, so raw_data is a view onto the page,
+    # rather than a copy of it. The smaller record types keep their own
+    # copies, since a memoryview object is bigger than their raw data.
     offset = record_counter * cls._ClassSize()
-    cal_size = struct.calcsize(cls.FORMAT)
-    raw_data = data[offset:offset + cls._ClassSize()]
-
-    cal_data = data[offset:offset + cal_size]
-    unpacked_data = cls._ClassFormat().unpack(cal_data)
+    raw_data = memoryview(data)[offset:offset + cls._ClassSize()]
+    unpacked_data = cls._ClassFormat().unpack_from(data, offset)
     return cls(unpacked_data, raw_data)
 
   def __init__ (self, data, raw_data):
     self.page_data = raw_data
     self.raw_data = raw_data
     self.data = data
-    subsize = struct.calcsize(SubCal.FORMAT)
-    offset = self.numsub * subsize
-    calsize = struct.calcsize(self.FORMAT)
-    caldata = raw_data[:calsize]
-    subdata = raw_data[calsize:calsize + offset]
-    crcdata = raw_data[calsize+offset:calsize+offset+2]
-
-    subcals = [ ]
-    for i in xrange(self.numsub):
-      offset = i * subsize
-      raw_sub = subdata[offset:offset+subsize]
-      sub = SubCal(raw_sub, self.data[1])
-      subcals.append(sub)
-
-    self.subcals = subcals
-
+    self._raw = None
+    subend = self._CAL_SIZE + self.numsub * self._SUB_SIZE
+    self.subcals = [ SubCal(raw_data[offset:offset+self._SUB_SIZE], self.data[1])
+                     for offset in range(self._CAL_SIZE, subend, self._SUB_SIZE) ]
+
+    # The crc is held in the last 2 bytes of the fixed-size record, and
+    # covers everything before it, including any unused sub-record slots.
+    # e.g. LEGACY_SIZE = 44 byte header + 6 * 17 byte SubCal + 2 byte crc.
+    # So it's checked once, over the whole record, not just numsub SubCals.
     self.check_crc()
   def to_dict (self):
     res = super(Calibration, self).to_dict( )
@@ -326,36 +452,16 @@ class Calibration(GenericTimestampedRecord):
     return res
   @property
   def crc(self):
-    return struct.unpack('H', self.raw_data[-2:])[0]
+    return _U16LE.unpack_from(self.raw_data, len(self.raw_data) - 2)[0]
 
 class LegacyCalibration (Calibration):
+  __slots__ = ()
   @classmethod
   def _ClassSize(cls):
 
     return cls.LEGACY_SIZE
 
 
-class SubCal (GenericTimestampedRecord):
-  FORMAT = '<IIIIc'
-  BASE_FIELDS = [ ]
-  FIELDS = [ 'entered', 'meter',  'sensor', 'applied', ]
-  def __init__ (self, raw_data, displayOffset=None):
-    self.raw_data = raw_data
-    self.data = self._ClassFormat().unpack(raw_data)
-    self.displayOffset = displayOffset
-  @property
-  def entered  (self):
-    return util.ReceiverTimeToTime(self.data[0])
-  @property
-  def meter  (self):
-    return int(self.data[1])
-  @property
-  def sensor  (self):
-    return int(self.data[2])
-  @property
-  def applied  (self):
-    return util.ReceiverTimeToTime(self.data[3])
-
 class MeterRecord(GenericTimestampedRecord):
   #  0 = system_time = uint (4 bytes)
   #  1 = display_time = uint (4 bytes)
@@ -363,6 +469,10 @@ class MeterRecord(GenericTimestampedRecord):
   #  3 = meter_time = uint (4 bytes)
   #  4 = crc = unsigned short (2 bytes)
   FORMAT = '<2IHIH'
+  __slots__ = ()
+  _NP_DTYPE = np.dtype([('system_secs', '<u4'), ('display_secs', '<u4'),
+                        ('calib_gluc', '<u2'), ('meter_secs', '<u4'),
+                        ('crc', '<u2')])
   FIELDS = ['calib_gluc', 'meter_time']
 
   @property
@@ -377,6 +487,10 @@ class MeterRecord(GenericTimestampedRecord):
   def meter_time(self):
     return util.ReceiverTimeToTime(self.data[3])
 
+  @classmethod
+  def PageMeterTime(cls, page):
+    return util.ReceiverTimesToDatetime64(page['meter_secs'])
+
   @property
   def record_type(self):
     return 1
@@ -415,6 +529,11 @@ class G5MeterRecord(GenericTimestampedRecord):
   #           xx = unsigned (1 byte) of unknown purpose
   #  6 = crc = unsigned short (2 bytes)
   FORMAT = '<2IHBIIH'
+  __slots__ = ()
+  _NP_DTYPE = np.dtype([('system_secs', '<u4'), ('display_secs', '<u4'),
+                        ('calib_gluc', '<u2'), ('record_type', 'u1'),
+                        ('meter_secs', '<u4'), ('xx_testNum', '<u4'),
+                        ('crc', '<u2')])
   FIELDS = ['calib_gluc', 'record_type', 'meter_time', 'xx_testNum']
 
   @property
@@ -429,6 +548,10 @@ class G5MeterRecord(GenericTimestampedRecord):
   def meter_secs(self): # seconds since BASE_TIME
     return self.data[4]
 
+  @classmethod
+  def PageMeterTime(cls, page):
+    return util.ReceiverTimesToDatetime64(page['meter_secs'])
+
   @property
   def xx_testNum(self):
     return self.data[5]
@@ -441,6 +564,10 @@ class G5MeterRecord(GenericTimestampedRecord):
   def testNum(self):
     return (self.data[5] >> 8) & 0xffffff
 
+  @classmethod
+  def PageTestNum(cls, page):
+    return (page['xx_testNum'] >> 8) & 0xffffff
+
   def __repr__(self):
     return '%s: Calib BG:%s' % (self.display_time, self.calib_gluc)
 
@@ -448,23 +575,18 @@ class G5MeterRecord(GenericTimestampedRecord):
 class EventRecord(GenericTimestampedRecord):
   # sys_time,display_time,glucose,meter_time,crc
   FORMAT = '<2I2B2IH'
+  __slots__ = ()
   FIELDS = ['event_type', 'event_sub_type', 'event_value' ]
 
   @property
   def event_type(self):
-    event_types = [None, 'CARBS', 'INSULIN', 'HEALTH', 'EXCERCISE',
-                    'MAX_VALUE']
-    return event_types[self.data[2]]
+    return constants.EVENT_TYPES[self.data[2]]
 
   @property
   def event_sub_type(self):
-    subtypes = {'INSULIN': [None, 'FAST', 'LONG'],
-                'HEALTH': [None, 'ILLNESS', 'STRESS', 'HIGH_SYMPTOMS',
-                            'LOW_SYMTOMS', 'CYCLE', 'ALCOHOL'],
-                'EXCERCISE': [None, 'LIGHT', 'MEDIUM', 'HEAVY',
-                              'MAX_VALUE']}
-    if self.event_type in subtypes:
-      return subtypes[self.event_type][self.data[3]]
+    subtypes = constants.EVENT_SUB_TYPES.get(self.event_type)
+    if subtypes is not None:
+      return subtypes[self.data[3]]
 
   @property
   def display_time(self):
@@ -501,6 +623,10 @@ class SensorRecord(GenericTimestampedRecord):
   # uint, uint, uint, uint, ushort
   # (system_seconds, display_seconds, unfiltered, filtered, rssi, crc)
   FORMAT = '<2IIIhH'
+  __slots__ = ()
+  _NP_DTYPE = np.dtype([('system_secs', '<u4'), ('display_secs', '<u4'),
+                        ('unfiltered', '<u4'), ('filtered', '<u4'),
+                        ('rssi', '<i2'), ('crc', '<u2')])
   # (unfiltered, filtered, rssi)
   FIELDS = ['unfiltered', 'filtered', 'rssi']
   @property
@@ -524,8 +650,12 @@ class EGVRecord(GenericTimestampedRecord):
   #  4 = crc = unsigned short (2 bytes)
   # uint, uint, ushort, byte, ushort
   # (system_seconds, display_seconds, glucose, trend_arrow, crc)
+  __slots__ = ()
   FIELDS = ['glucose', 'trend_arrow']
   FORMAT = '<2IHBH'
+  _NP_DTYPE = np.dtype([('system_secs', '<u4'), ('display_secs', '<u4'),
+                        ('full_glucose', '<u2'), ('full_trend', 'u1'),
+                        ('crc', '<u2')])
 
   @property
   def full_glucose(self):
@@ -556,6 +686,23 @@ class EGVRecord(GenericTimestampedRecord):
   def testNum(self):
     return 0
 
+  @classmethod
+  def PageGlucose(cls, page):
+    return page['full_glucose'] & constants.EGV_VALUE_MASK
+
+  @classmethod
+  def PageDisplayOnly(cls, page):
+    return (page['full_glucose'] & constants.EGV_DISPLAY_ONLY_MASK) != 0
+
+  @classmethod
+  def PageTrend(cls, page):
+    # Index into constants.TREND_ARROW_VALUES, for each record
+    return page['full_trend'] & constants.EGV_TREND_ARROW_MASK
+
+  @classmethod
+  def PageTestNum(cls, page):
+    return np.zeros(len(page), dtype=np.uint32)
+
   @property
   def trend_arrow(self):
     arrow_value = self.full_trend & constants.EGV_TREND_ARROW_MASK
@@ -587,11 +734,21 @@ class G5EGVRecord(EGVRecord):
   #    = realtime (non-smoothed) glucose value [for G6] = ushort (2 bytes)
   #  9 = crc = unsigned short (2 bytes)
   FORMAT = '<2IHIBIBBHH'
+  __slots__ = ()
+  _NP_DTYPE = np.dtype([('system_secs', '<u4'), ('display_secs', '<u4'),
+                        ('full_glucose', '<u2'), ('meter_secs', '<u4'),
+                        ('unknown1', 'u1'), ('xx_testNum', '<u4'),
+                        ('full_trend', 'u1'), ('unknown2', 'u1'),
+                        ('realtime', '<u2'), ('crc', '<u2')])
 
   @property
   def testNum(self):
     return self.data[5] & EGV_TESTNUM_MASK
 
+  @classmethod
+  def PageTestNum(cls, page):
+    return page['xx_testNum'] & EGV_TESTNUM_MASK
+
   @property
   def full_trend(self):
     return self.data[6]
@@ -603,3 +760,4 @@ class G5EGVRecord(EGVRecord):
 
 class G6EGVRecord (G5EGVRecord):
   FORMAT = '<2IHIBIBBHH'
+  __slots__ = ()
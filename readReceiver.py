@@ -154,13 +154,19 @@ class readReceiverBase(readdata.Dexcom):
                 curs.execute('CREATE TABLE IF NOT EXISTS EgvRecord( sysSeconds INT PRIMARY KEY, dispSeconds INT, full_glucose INT, glucose INT, testNum INT, trend INT);')
                 insert_egv_sql = '''INSERT OR IGNORE INTO EgvRecord( sysSeconds, dispSeconds, full_glucose, glucose, testNum, trend) VALUES (?, ?, ?, ?, ?, ?);'''
 
-                respList = self.ReadRecords('EGV_DATA')
-                #printJustOne = True
-                for cgm_rec in respList:
-                    #if printJustOne:
-                        #print ('EGV_DATA : raw_data =', ' '.join(' %02x' % ord(c) for c in cgm_rec.raw_data))
-                        #printJustOne = False
-                    curs.execute(insert_egv_sql, (cgm_rec.system_secs, cgm_rec.display_secs, cgm_rec.full_glucose, cgm_rec.glucose, cgm_rec.testNum, cgm_rec.full_trend))
+                # EGV records are the most numerous, so they're read as numpy
+                # columns and inserted in one go, rather than record by record.
+                # Like ReadRecords(), a bad crc ends the read, keeping the good
+                # records read before it.
+                egvArray = self.ReadRecordArray('EGV_DATA')
+                if egvArray is not None:
+                    egvClass, egvPage = egvArray
+                    curs.executemany(insert_egv_sql, zip(egvPage['system_secs'].tolist(),
+                                                         egvPage['display_secs'].tolist(),
+                                                         egvPage['full_glucose'].tolist(),
+                                                         egvClass.PageGlucose(egvPage).tolist(),
+                                                         egvClass.PageTestNum(egvPage).tolist(),
+                                                         egvPage['full_trend'].tolist()))
 
                 curs.execute('CREATE TABLE IF NOT EXISTS UserEvent( sysSeconds INT PRIMARY KEY, dispSeconds INT, meterSeconds INT, type INT, subtype INT, value INT, xoffset REAL, yoffset REAL);')
                 insert_evt_sql = '''INSERT OR IGNORE INTO UserEvent( sysSeconds, dispSeconds, meterSeconds, type, subtype, value, xoffset, yoffset) VALUES (?, ?, ?, ?, ?, ?, ?, ?);'''
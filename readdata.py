@@ -56,6 +56,7 @@ import re
 import util
 import xml.etree.ElementTree as ET
 import platform
+import numpy as np
 from traceback import print_exc
 
 # Some services are only to be invoked on unix-based OSs
@@ -605,18 +606,27 @@ class Dexcom(object):
     return struct.unpack('II', packet.data)
 
   def ReadDatabasePage(self, record_type, page):
+    page_data = self.ReadDatabasePageData(record_type, page)
+    if page_data is None:
+        return []
+    header, packet_data = page_data
+    return self.ParsePage(header, packet_data)
+
+  def ReadDatabasePageData(self, record_type, page):
+    # Returns the (header, record data) of a database page, or None if
+    # the page couldn't be read.
     record_type_index = constants.RECORD_TYPES.index(record_type)
     try:
         self.WriteCommand(constants.READ_DATABASE_PAGES,
                           (chr(record_type_index), struct.pack('I', page), chr(1)))
         packet = self.readpacket()
     except Exception as e:
-        #print ('ReadDatabasePage() Exception =', e)
+        #print ('ReadDatabasePageData() Exception =', e)
         if sys.version_info < (3, 0):
             sys.exc_clear()
-        return []
+        return None
     if packet is None:
-        return []
+        return None
     assert ord(packet.command) == 1
     # first index (uint), numrec (uint), record_type (byte), revision (byte),
     # page# (uint), r1 (uint), r2 (uint), r3 (uint), ushort (Crc)
@@ -629,11 +639,16 @@ class Dexcom(object):
     assert header[4] == page
     packet_data = packet.data[header_data_len:]
 
-    return self.ParsePage(header, packet_data)
+    return (header, packet_data)
 
   def GenericRecordYielder(self, header, data, record_type):
-    for x in xrange(header[1]):
-      yield record_type.Create(data, x)
+    if record_type._NP_DTYPE is not None:
+      for record in record_type.CreateAll(data, header[1]):
+        yield record
+    else:
+      create = record_type.Creator()
+      for x in xrange(header[1]):
+        yield create(data, x)
 
   PARSER_MAP = {
       'USER_EVENT_DATA': database_records.EventRecord,
@@ -644,7 +659,9 @@ class Dexcom(object):
       'SENSOR_DATA': database_records.SensorRecord,
   }
 
-  def ParsePage(self, header, data):
+  def PageRecordClass(self, header):
+    # Returns the database_records class used to parse the records of
+    # the page with this header, or None if there isn't one.
     record_type = constants.RECORD_TYPES[ord(header[2])]
     revision = int(header[3])
     generic_parser_map = self.PARSER_MAP
@@ -656,10 +673,14 @@ class Dexcom(object):
       generic_parser_map.update(METER_DATA=database_records.G5MeterRecord)
     if revision < 2 and record_type == 'CAL_SET':
       generic_parser_map.update(CAL_SET=database_records.LegacyCalibration)
+    return generic_parser_map.get(record_type)
+
+  def ParsePage(self, header, data):
+    record_type = constants.RECORD_TYPES[ord(header[2])]
+    record_class = self.PageRecordClass(header)
     xml_parsed = ['PC_SOFTWARE_PARAMETER', 'MANUFACTURING_DATA']
-    if record_type in generic_parser_map:
-      return self.GenericRecordYielder(header, data,
-                                       generic_parser_map[record_type])
+    if record_class is not None:
+      return self.GenericRecordYielder(header, data, record_class)
     elif record_type in xml_parsed:
       return [database_records.GenericXMLRecord.Create(data, 0)]
     else:
@@ -717,6 +738,47 @@ class Dexcom(object):
             sys.exc_clear()
         return records
 
+  def ReadRecordArray(self, record_type):
+    # Like ReadRecords(), but for the fixed-format record types (those with
+    # a numpy _NP_DTYPE) it returns every record as one CRC checked numpy
+    # structured array, without building an object for each record.
+    # Returns (record class, array), or None if no pages could be read.
+    record_class = None
+    pages = []
+    assert record_type in constants.RECORD_TYPES
+    try:
+        page_range = self.ReadDatabasePageRange(record_type)
+        if page_range != []:
+            start, end = page_range
+            if start != end or not end:
+              end += 1
+            for x in range(start, end):
+              page_data = self.ReadDatabasePageData(record_type, x)
+              if page_data is None:
+                  break
+              header, data = page_data
+              record_class = self.PageRecordClass(header)
+              # As with ReadRecords(), a bad crc ends the read, but the
+              # good records which come before it are kept.
+              bad = record_class.BadCrcIndices(data, header[1])
+              if bad.size:
+                  pages.append(record_class.Page(data, int(bad[0])))
+                  break
+              pages.append(record_class.Page(data, header[1]))
+    except serial.SerialException as e:
+        #print ('ReadRecordArray() : SerialException =', e)
+        if sys.version_info < (3, 0):
+            sys.exc_clear()
+        self.Disconnect()
+        self.Connect()
+    except Exception as e:
+        #print ('ReadRecordArray() : Exception =', e)
+        if sys.version_info < (3, 0):
+            sys.exc_clear()
+    if not pages:
+        return None
+    return (record_class, np.concatenate(pages))
+
 class DexcomG5 (Dexcom):
   PARSER_MAP = {
       'USER_EVENT_DATA': database_records.EventRecord,
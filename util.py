@@ -42,6 +42,7 @@ import constants
 import datetime
 import platform
 import sys
+import numpy as np
 import serial.tools.list_ports
 
 if sys.platform == 'win32':
@@ -54,6 +55,14 @@ if sys.platform == 'win32':
 def ReceiverTimeToTime(rtime):
   return constants.BASE_TIME + datetime.timedelta(seconds=rtime)
 
+_BASE_TIME64 = np.datetime64(constants.BASE_TIME, 's')
+
+def ReceiverTimesToDatetime64(rtimes):
+  # Array version of ReceiverTimeToTime(). Converts a whole column of receiver
+  # times into numpy datetime64[s] values, in one vectorized add, rather than
+  # building a datetime object for each one.
+  return _BASE_TIME64 + np.asarray(rtimes).astype('timedelta64[s]')
+
 def thisIsWine():
     if sys.platform == 'win32':
         try: